@@ -17,6 +17,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // 设置当前页面的活动状态（会展开相关节点）
     setActiveNavItem();
     
+    // 初始化页面目录（标题跳转和当前章节高亮）
+    initPageToc();
+    
     // 立即初始化滚动监听（必须在恢复前设置，否则会被恢复覆盖）
     initSidebarScrollListener();
     
@@ -172,41 +175,8 @@ function ensureActiveItemVisible(hasRestoredPosition) {
 }
 
 function initNavTree() {
-    // 处理箭头点击（展开/折叠）
-    const toggleIcons = document.querySelectorAll('.nav-link-icon[data-toggle="collapse"]');
-    
-    toggleIcons.forEach(icon => {
-        icon.addEventListener('click', function(e) {
-            e.preventDefault();
-            e.stopPropagation();
-            
-            const navLink = this.closest('.nav-link');
-            const children = navLink ? navLink.nextElementSibling : null;
-            
-            if (children && children.classList.contains('nav-children')) {
-                const isExpanded = children.classList.contains('expanded');
-                
-                if (isExpanded) {
-                    children.classList.remove('expanded');
-                    this.classList.remove('expanded');
-                } else {
-                    children.classList.add('expanded');
-                    this.classList.add('expanded');
-                }
-            }
-        });
-    });
-    
-    // 防止目录名称链接点击时触发展开/折叠
-    const navLinkTexts = document.querySelectorAll('.nav-link.has-children .nav-link-text');
-    navLinkTexts.forEach(textLink => {
-        textLink.addEventListener('click', function(e) {
-            // 允许链接正常跳转，不阻止默认行为
-            e.stopPropagation();
-            // 保存滚动位置
-            saveSidebarScroll();
-        });
-    });
+    // 处理箭头点击（展开/折叠）和目录名称链接点击
+    bindNavToggles(document);
     
     // 为所有导航链接添加点击事件，保存滚动位置
     // 使用捕获阶段，确保在跳转前保存
@@ -251,6 +221,100 @@ function initNavTree() {
     });
 }
 
+// 为 root 中的箭头和目录名称链接绑定点击事件（延迟加载的子树插入后再次调用）
+function bindNavToggles(root) {
+    const toggleIcons = root.querySelectorAll('.nav-link-icon[data-toggle="collapse"]');
+    
+    toggleIcons.forEach(icon => {
+        icon.addEventListener('click', function(e) {
+            e.preventDefault();
+            e.stopPropagation();
+            
+            const navLink = this.closest('.nav-link');
+            const children = navLink ? navLink.nextElementSibling : null;
+            
+            if (children && children.classList.contains('nav-children')) {
+                const isExpanded = children.classList.contains('expanded');
+                
+                if (isExpanded) {
+                    children.classList.remove('expanded');
+                    this.classList.remove('expanded');
+                } else {
+                    // 子树尚未输出时先加载目录片段
+                    loadNavFragment(children);
+                    children.classList.add('expanded');
+                    this.classList.add('expanded');
+                }
+            }
+        });
+    });
+    
+    // 防止目录名称链接点击时触发展开/折叠
+    const navLinkTexts = root.querySelectorAll('.nav-link.has-children .nav-link-text');
+    navLinkTexts.forEach(textLink => {
+        textLink.addEventListener('click', function(e) {
+            // 允许链接正常跳转，不阻止默认行为
+            e.stopPropagation();
+            // 保存滚动位置
+            saveSidebarScroll();
+        });
+    });
+}
+
+// 加载延迟输出的子树（data-nav-fragment 指向目录片段 JSON），只加载一次
+function loadNavFragment(children) {
+    const fragmentUrl = children.getAttribute('data-nav-fragment');
+    if (!fragmentUrl) return;
+    children.removeAttribute('data-nav-fragment');
+    
+    const navTree = document.querySelector('.nav-tree');
+    const basePath = navTree ? navTree.getAttribute('data-base-path') || '' : '';
+    
+    fetch(fragmentUrl)
+        .then(response => {
+            if (!response.ok) throw new Error(response.statusText);
+            return response.json();
+        })
+        .then(data => {
+            // 与 build_site.py 输出的导航结构保持一致
+            data.items.forEach(item => {
+                const li = document.createElement('li');
+                li.className = 'nav-item';
+                
+                const navLink = document.createElement('div');
+                navLink.className = 'nav-link' + (item.fragment ? ' has-children' : '');
+                
+                const icon = document.createElement('span');
+                icon.className = 'nav-link-icon';
+                if (item.fragment) icon.setAttribute('data-toggle', 'collapse');
+                navLink.appendChild(icon);
+                
+                const link = document.createElement('a');
+                link.href = basePath + item.path;
+                link.className = 'nav-link-text';
+                link.setAttribute('data-path', item.path);
+                link.textContent = item.name;
+                navLink.appendChild(link);
+                
+                li.appendChild(navLink);
+                
+                if (item.fragment) {
+                    const subChildren = document.createElement('ul');
+                    subChildren.className = 'nav-children';
+                    subChildren.setAttribute('data-nav-fragment', basePath + item.fragment);
+                    li.appendChild(subChildren);
+                }
+                
+                children.appendChild(li);
+            });
+            bindNavToggles(children);
+        })
+        .catch(() => {
+            // 加载失败时允许再次展开重试
+            children.setAttribute('data-nav-fragment', fragmentUrl);
+        });
+}
+
 function setActiveNavItem() {
     const currentPath = window.location.pathname;
     const navLinkTexts = document.querySelectorAll('.nav-link-text[data-path]');
@@ -283,6 +347,71 @@ function setActiveNavItem() {
     });
 }
 
+// 初始化页面目录：目录由 build_site.py 预先生成，只需按目录中的 id 查找标题
+function initPageToc() {
+    const tocLinks = Array.from(document.querySelectorAll('.page-toc-item a[href^="#"]'));
+    if (tocLinks.length === 0) return;
+    
+    // 地址中的锚点不是标题 id 时（例如 #标题文字），按标题名称解析
+    resolveHeadingHash(tocLinks);
+    window.addEventListener('hashchange', function() {
+        resolveHeadingHash(tocLinks);
+    });
+    
+    if (!('IntersectionObserver' in window)) return;
+    
+    // 标题 id -> 目录链接
+    const linkById = new Map();
+    tocLinks.forEach(link => {
+        const id = decodeHash(link.getAttribute('href'));
+        if (document.getElementById(id)) linkById.set(id, link);
+    });
+    
+    // 高亮最上方可见的标题对应的目录项
+    const visibleIds = new Set();
+    const observer = new IntersectionObserver(function(entries) {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                visibleIds.add(entry.target.id);
+            } else {
+                visibleIds.delete(entry.target.id);
+            }
+        });
+        
+        const currentId = Array.from(linkById.keys()).find(id => visibleIds.has(id));
+        if (!currentId) return;
+        tocLinks.forEach(link => link.classList.remove('active'));
+        linkById.get(currentId).classList.add('active');
+    }, { rootMargin: '-56px 0px -60% 0px' });
+    
+    linkById.forEach((link, id) => observer.observe(document.getElementById(id)));
+}
+
+// 解码锚点（去掉 #），格式错误（例如 #%E4）时返回原始值
+function decodeHash(hash) {
+    const raw = hash.replace(/^#/, '');
+    try {
+        return decodeURIComponent(raw);
+    } catch (e) {
+        return raw;
+    }
+}
+
+// 将按标题名称书写的锚点解析为标题 id 并跳转
+function resolveHeadingHash(tocLinks) {
+    if (!window.location.hash) return;
+    const hash = decodeHash(window.location.hash);
+    if (document.getElementById(hash)) return;
+    
+    const normalize = text => text.replace(/[-_\s]+/g, ' ').trim().toLowerCase();
+    const name = normalize(hash);
+    const link = tocLinks.find(link => normalize(link.textContent) === name);
+    if (!link) return;
+    
+    const heading = document.getElementById(decodeHash(link.getAttribute('href')));
+    if (heading) heading.scrollIntoView();
+}
+
 // 递归展开包含活动项的路径
 function expandActivePath() {
     const activeLink = document.querySelector('.nav-link.active');
@@ -0,0 +1,157 @@
+// Service Worker（由 build_site.py 根据 sw_template.js 生成，请勿直接修改 sw.js）
+
+// 所有输出文件及其内容哈希（相对站点根目录）
+const MANIFEST = {{ manifest | tojson }};
+// 安装时预缓存的文件：assets 和首页（导航骨架）
+const PRECACHE_PATHS = {{ precache_paths | tojson }};
+
+// 预缓存按内容版本分开存放：安装时写入新的缓存，激活后才替换旧的缓存，
+// 安装过程中（或安装失败后）旧的 Service Worker 仍然使用完整的旧版本
+const PRECACHE_PREFIX = 'yggdrasil-precache';
+const PRECACHE = PRECACHE_PREFIX + '-{{ precache_version }}';
+const PAGE_CACHE = 'yggdrasil-pages';
+const IMAGE_CACHE = 'yggdrasil-images';
+// 记录页面和图片缓存对应的文件哈希
+const META_CACHE = 'yggdrasil-meta';
+const MAX_PAGES = {{ max_pages }};
+const MAX_IMAGES = {{ max_images }};
+// 记录已缓存文件哈希的元数据
+const REVISIONS_KEY = '__revisions__';
+
+const SCOPE = new URL('./', self.location).href;
+
+// 站点内路径 -> 请求 URL
+function toUrl(path) {
+    return new URL(path, SCOPE).href;
+}
+
+// 请求 URL -> 站点内路径（目录补全为 index.html），不在站点内返回 null
+function toPath(url) {
+    const parsed = new URL(url);
+    parsed.search = '';
+    parsed.hash = '';
+    let href = parsed.href;
+    if (!href.startsWith(SCOPE)) return null;
+    let path = decodeURIComponent(href.slice(SCOPE.length));
+    if (path === '' || path.endsWith('/')) path += 'index.html';
+    return path;
+}
+
+async function loadRevisions(cacheName) {
+    const cache = await caches.open(cacheName);
+    const response = await cache.match(REVISIONS_KEY);
+    return response ? response.json() : {};
+}
+
+async function saveRevisions(cacheName, revisions) {
+    const cache = await caches.open(cacheName);
+    await cache.put(REVISIONS_KEY, new Response(JSON.stringify(revisions)));
+}
+
+// 在旧版本的预缓存中查找哈希相同的文件
+async function findPrecached(path) {
+    for (const cacheName of await caches.keys()) {
+        if (!cacheName.startsWith(PRECACHE_PREFIX) || cacheName === PRECACHE) continue;
+        const revisions = await loadRevisions(cacheName);
+        if (revisions[path] !== MANIFEST[path]) continue;
+        const cached = await (await caches.open(cacheName)).match(toUrl(path));
+        if (cached) return cached;
+    }
+    return null;
+}
+
+// 缓存条目超过上限时淘汰最早加入的条目
+async function trimCache(cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const keys = await cache.keys();
+    for (let i = 0; i < keys.length - maxEntries; i++) {
+        await cache.delete(keys[i]);
+    }
+}
+
+// 安装：把预缓存文件写入本版本的缓存，哈希未变化的文件从旧版本的缓存复制，
+// 其他文件重新下载，任一文件下载失败则安装失败
+self.addEventListener('install', function(event) {
+    event.waitUntil((async function() {
+        const cache = await caches.open(PRECACHE);
+        for (const path of PRECACHE_PATHS) {
+            const url = toUrl(path);
+            // 本版本的缓存中已有的文件来自之前中断的安装，内容与本版本一致
+            if (await cache.match(url)) continue;
+            const previous = await findPrecached(path);
+            if (previous) {
+                await cache.put(url, previous);
+                continue;
+            }
+            const response = await fetch(url, { cache: 'no-cache' });
+            // 下载失败（例如部署尚未完成）时安装失败，继续使用旧的 Service Worker，下次注册时重试
+            if (!response.ok) throw new Error(`预缓存失败: ${path} (${response.status})`);
+            await cache.put(url, response);
+        }
+        const revisions = {};
+        for (const path of PRECACHE_PATHS) revisions[path] = MANIFEST[path];
+        await saveRevisions(PRECACHE, revisions);
+        await self.skipWaiting();
+    })());
+});
+
+// 激活：删除旧版本的预缓存，以及页面和图片缓存中哈希已变化或已不存在的条目，然后记录新的哈希
+self.addEventListener('activate', function(event) {
+    event.waitUntil((async function() {
+        for (const cacheName of await caches.keys()) {
+            if (cacheName.startsWith(PRECACHE_PREFIX) && cacheName !== PRECACHE) {
+                await caches.delete(cacheName);
+            }
+        }
+
+        const revisions = await loadRevisions(META_CACHE);
+        for (const cacheName of [PAGE_CACHE, IMAGE_CACHE]) {
+            const cache = await caches.open(cacheName);
+            for (const request of await cache.keys()) {
+                const path = toPath(request.url);
+                if (path === null || !(path in MANIFEST) || revisions[path] !== MANIFEST[path]) {
+                    await cache.delete(request);
+                }
+            }
+        }
+        await saveRevisions(META_CACHE, MANIFEST);
+        await self.clients.claim();
+    })());
+});
+
+// 先返回缓存，同时在后台更新缓存
+async function staleWhileRevalidate(event, cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(event.request);
+    const update = fetch(event.request).then(async function(response) {
+        if (response.ok) {
+            await cache.put(event.request, response.clone());
+            await trimCache(cacheName, maxEntries);
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(update.catch(function() {}));
+        return cached;
+    }
+    return update;
+}
+
+self.addEventListener('fetch', function(event) {
+    if (event.request.method !== 'GET') return;
+    const path = toPath(event.request.url);
+    if (path === null || !(path in MANIFEST)) return;
+
+    if (PRECACHE_PATHS.includes(path)) {
+        // 只从本版本的预缓存读取，不会读到正在安装的新版本
+        event.respondWith(caches.open(PRECACHE).then(function(cache) {
+            return cache.match(toUrl(path));
+        }).then(function(cached) {
+            return cached || fetch(event.request);
+        }));
+    } else if (path.endsWith('.html')) {
+        event.respondWith(staleWhileRevalidate(event, PAGE_CACHE, MAX_PAGES));
+    } else {
+        event.respondWith(staleWhileRevalidate(event, IMAGE_CACHE, MAX_IMAGES));
+    }
+});
@@ -0,0 +1,19 @@
+// 关闭 Service Worker 时生成的 sw.js（由 build_site.py 复制，请勿直接修改 sw.js）
+// 已安装旧 Service Worker 的浏览器更新到此版本后，删除所有缓存并注销，之后直接从网络加载
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(self.skipWaiting());
+});
+
+self.addEventListener('activate', function(event) {
+    event.waitUntil((async function() {
+        for (const cacheName of await caches.keys()) {
+            if (cacheName.startsWith('yggdrasil-')) await caches.delete(cacheName);
+        }
+        await self.registration.unregister();
+        // 刷新已打开的页面，使其不再由旧缓存提供
+        for (const client of await self.clients.matchAll({ type: 'window' })) {
+            client.navigate(client.url);
+        }
+    })());
+});
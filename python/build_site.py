@@ -6,9 +6,13 @@ Markdown 转 HTML 文档站点生成器
 """
 
 import os
+import posixpath
 import shutil
 import json
 import re
+import hashlib
+import html
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import quote, unquote
@@ -16,7 +20,27 @@ from urllib.parse import quote, unquote
 import markdown
 from markdown.extensions import codehilite, toc, fenced_code
 from bs4 import BeautifulSoup
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from markupsafe import escape
+
+from html_minifier import MINIFIER_VERSION, minify_html
+from search_index import SearchIndex, resolve_index_path
+from site_config import CACHE_DIR, get_project_root, load_config
+from site_output import ArchiveOutput, DirectoryOutput
+
+# 默认的首屏关键样式选择器前缀（页面布局和导航）
+DEFAULT_CRITICAL_SELECTORS = [
+    ':root', '*', 'body', '.top-navbar', '.sidebar', '.nav-', '.main-content', '.page-toc',
+]
+
+# 默认只按完整选择器匹配的关键样式（正文容器的布局，不包括正文排版）
+DEFAULT_CRITICAL_EXACT_SELECTORS = ['.content-body']
+
+# 模板中每个页面不同的值，快速渲染时在这些位置拼接
+PAGE_SLOTS = ('title', 'content', 'nav_tree', 'toc', 'preload_image')
+
+# 每批渲染的页面数（压缩时按批并行处理，避免所有页面同时驻留内存）
+PAGE_BATCH_SIZE = 256
 
 
 class DocSiteBuilder:
@@ -31,20 +55,26 @@ class DocSiteBuilder:
         self.html_dir = self.view_dir / "html"
         
         # 加载配置文件
-        self.config = self._load_config(config_path)
+        self.config = load_config(config_path)
         
         # 验证目录是否存在
         if not self.docs_dir.exists():
             raise FileNotFoundError(f"文档目录不存在: {self.docs_dir}")
         
+        # 构建缓存目录（不随站点发布）
+        self.cache_dir = CACHE_DIR
+        
         # 初始化目录
         self.assets_dir.mkdir(parents=True, exist_ok=True)
-        self.html_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / "jinja").mkdir(parents=True, exist_ok=True)
         
-        # 初始化 Jinja2 环境
+        # 初始化 Jinja2 环境（模板编译结果缓存到磁盘，重复构建时跳过编译）
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(self.template_dir)),
-            autoescape=select_autoescape(['html', 'xml'])
+            autoescape=select_autoescape(['html', 'xml']),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            bytecode_cache=FileSystemBytecodeCache(str(self.cache_dir / "jinja"))
         )
         
         # 初始化 Markdown 转换器
@@ -70,35 +100,100 @@ class DocSiteBuilder:
         self.path_mapping = {}
         # 存储转换后的 HTML 内容
         self.html_contents = {}
+        # 存储每个页面的目录 (html路径 -> toc 扩展生成的 toc_tokens)
+        self.page_toc = {}
         # 存储允许的顶级目录（从配置中读取）
         self.allowed_top_dirs = set(self.config.get('top', []))
+        # 存储本次构建写出的文件 (view相对路径 -> sha256)
+        self.output_hashes = {}
+        # 存储本次构建删除的旧文件 (view相对路径)
+        self.removed_outputs = set()
+        # 可复现构建：设置 SOURCE_DATE_EPOCH 时统一输出文件的修改时间
+        source_date_epoch = os.environ.get('SOURCE_DATE_EPOCH')
+        self.source_date_epoch = int(source_date_epoch) if source_date_epoch else None
+        # 输出归档路径（未配置时写入 docs 目录）
+        output_archive = self.config.get('output_archive')
+        self.output_archive = (self.view_dir.parent / output_archive) if output_archive else None
+        # 输出后端，构建时创建
+        self.output = None
+        # 是否压缩生成的 HTML 页面
+        self.minify = bool(self.config.get('minify', False))
+        # 本次构建使用到的压缩缓存项
+        self.used_minify_keys = set()
+        # 首屏渲染优化：内联关键样式、脚本延迟执行、预加载首图和字体
+        critical_path = self.config.get('critical_path', {})
+        self.inline_critical_css = bool(critical_path.get('inline_critical_css', True))
+        self.defer_scripts = bool(critical_path.get('defer_scripts', True))
+        self.preload = bool(critical_path.get('preload', True))
+        self.critical_selectors = critical_path.get('selectors', DEFAULT_CRITICAL_SELECTORS)
+        self.critical_exact_selectors = critical_path.get('exact_selectors', DEFAULT_CRITICAL_EXACT_SELECTORS)
+        # 关键样式缓存 (style.css 的修改时间和大小, 关键样式)
+        self._critical_css_cache = None
+        # 按页面深度等预编译的模板片段 (base_path, 预加载类型, 是否有页面目录) -> (静态片段, 插入位置) 或 None
+        self._page_segments = {}
+        # 快速渲染时复用的输出缓冲区
+        self._page_buffer = bytearray()
+        # Service Worker：预缓存 assets 和首页，页面和图片按访问缓存
+        self.service_worker_config = self.config.get('service_worker', {})
+        self.service_worker = bool(self.service_worker_config.get('enabled', True))
+        # 延迟加载导航：只输出当前分支和其他分支的第一层，折叠的子树展开时再加载
+        self.lazy_nav = bool(self.config.get('nav', {}).get('lazy', False))
+        # 页面目录（"本页内容"侧栏）：只列出 2 级到 max_level 级标题，少于 min_headings 个时不显示
+        page_toc_config = self.config.get('page_toc', {})
+        self.page_toc_enabled = bool(page_toc_config.get('enabled', True))
+        self.page_toc_max_level = page_toc_config.get('max_level', 3)
+        self.page_toc_min_headings = page_toc_config.get('min_headings', 2)
+        # 全文搜索索引（供 search_site.py 查询）
+        search_config = self.config.get('search', {})
+        self.search_enabled = bool(search_config.get('enabled', True))
+        self.search_index_path = resolve_index_path(self.config, self.view_dir.parent)
         
     def build(self):
         """构建整个站点"""
         print("开始构建文档站点...")
         
-        # 清理 docs 目录（保留模板和 assets）
-        self._clean_view_dir()
+        if self.output_archive:
+            # 直接写入归档，不修改 docs 目录
+            print(f"输出归档: {self.output_archive}")
+            self.output = ArchiveOutput(self.output_archive, self.source_date_epoch)
+        else:
+            # 清理 docs 目录（保留模板和 assets）
+            self._clean_view_dir()
+            self.output = DirectoryOutput(self.view_dir, self.source_date_epoch)
         
-        # 记录根目录 README.md 的路径映射（用于链接处理，但不显示在导航栏）
-        readme_path = self.docs_dir / "README.md"
-        if readme_path.exists():
-            self.path_mapping["README.md"] = "index.html"
+        try:
+            self._build_outputs()
+        except BaseException:
+            self.output.abort()
+            raise
+        self.output.close()
         
+        print("构建完成！")
+    
+    def _build_outputs(self):
+        """生成所有输出文件"""
         # 构建文件路径映射和导航树
         print("扫描文档目录...")
-        self.nav_tree = self._build_nav_tree()
+        self.scan()
         
         # 转换所有 Markdown 文件（包括根目录的 README.md）
         print("转换 Markdown 文件...")
         self._convert_all_markdown()
         
         # 如果根目录没有 README.md，生成默认首页内容
-        if not readme_path.exists():
+        if not (self.docs_dir / "README.md").exists():
             print("生成默认首页内容...")
             default_content = "<h1>欢迎</h1><p>这是文档站点的首页。</p>"
             self.html_contents["index.html"] = default_content
         
+        # 检查指向页内标题的链接
+        self._check_anchor_links()
+        
+        # 更新全文搜索索引
+        if self.search_enabled:
+            print("更新搜索索引...")
+            self._update_search_index()
+        
         # 复制所有图片文件
         print("复制图片文件...")
         self._copy_all_images()
@@ -107,47 +202,156 @@ class DocSiteBuilder:
         print("生成 HTML 页面...")
         self._generate_all_pages()
         
-        print("构建完成！")
+        # 生成导航片段（延迟加载导航）
+        if self.lazy_nav:
+            print("生成导航片段...")
+            self._generate_nav_fragments()
+        
+        # 生成锚点索引（页面 -> 标题 -> id）
+        print("生成锚点索引...")
+        self._write_anchor_index()
+        
+        # 删除本次构建未生成的旧文件（已删除的 md 文件对应的 html 等）
+        self._remove_stale_outputs()
+        
+        # 生成 Service Worker（离线访问和重复访问缓存）
+        print("生成 Service Worker...")
+        self._generate_service_worker()
+        
+        # 归档需要包含 assets
+        if self.output_archive:
+            print("写入 assets...")
+            self._write_assets()
+        
+        # 生成变更清单（用于增量部署）
+        print("生成变更清单...")
+        self._write_manifest()
     
-    def _load_config(self, config_path: str) -> Dict:
-        """加载配置文件"""
-        config_file = Path(config_path)
-        if not config_file.is_absolute():
-            # 如果是相对路径，相对于脚本所在目录
-            script_dir = Path(__file__).parent
-            config_file = script_dir / config_path
+    def scan(self):
+        """扫描文档目录，构建路径映射和导航树"""
+        # 记录根目录 README.md 的路径映射（用于链接处理，但不显示在导航栏）
+        if (self.docs_dir / "README.md").exists():
+            self.path_mapping["README.md"] = "index.html"
         
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    print(f"已加载配置文件: {config_file}")
-                    return config
-            except Exception as e:
-                print(f"警告: 加载配置文件失败: {e}，使用默认配置")
-                return {}
-        else:
-            print(f"警告: 配置文件不存在: {config_file}，使用默认配置")
-            return {}
+        self.nav_tree = self._build_nav_tree()
     
     def _clean_view_dir(self):
-        """清理 docs 目录，保留模板和 assets"""
+        """清理 docs 目录，保留模板和 assets
+        
+        html 和 nav 目录不再整体删除：内容未变化的文件保持原样（包括修改时间），
+        已删除的 md 文件对应的旧文件在构建结束时由 _remove_stale_outputs 清理。
+        """
         # 清理根目录下的 HTML 文件（除了 index.html）
         for item in self.view_dir.iterdir():
             if item.is_file() and item.suffix == '.html' and item.name != 'index.html':
                 if item.name not in ['template.html']:
                     item.unlink()
             elif item.is_dir():
-                # 清理所有目录（除了 assets 和 html，html 目录会单独清理）
-                if item.name not in ['assets', 'html']:
+                # 清理所有目录（除了 assets、html 和 nav，html 和 nav 目录会单独清理）
+                if item.name not in ['assets', 'html', 'nav']:
                     shutil.rmtree(item)
         
-        # 完全清空 html 目录（防止已删除的 md 文件对应的 html 还在）
-        if self.html_dir.exists():
-            print("清空 html 目录...")
-            shutil.rmtree(self.html_dir)
         self.html_dir.mkdir(parents=True, exist_ok=True)
     
+    def _write_output(self, rel_path: str, data: bytes):
+        """写入输出文件并记录哈希
+        
+        Args:
+            rel_path: 相对 docs 目录的路径
+            data: 文件内容
+        """
+        self.output_hashes[rel_path] = hashlib.sha256(data).hexdigest()
+        self.output.write(rel_path, data)
+    
+    def _remove_stale_outputs(self):
+        """删除 html 和 nav 目录中本次构建未生成的文件和空目录"""
+        for sub_dir in ("html", "nav"):
+            self.removed_outputs.update(self.output.remove_stale(sub_dir, set(self.output_hashes)))
+    
+    def _write_assets(self):
+        """将 assets 写入输出"""
+        for file_path in sorted(self.assets_dir.rglob("*")):
+            if file_path.is_file():
+                with open(file_path, 'rb') as f:
+                    self._write_output(file_path.relative_to(self.view_dir).as_posix(), f.read())
+    
+    def _collect_output_hashes(self) -> Dict[str, str]:
+        """获取所有输出文件的 sha256 (view相对路径 -> sha256)"""
+        # assets 不由构建生成，但同样需要部署
+        files = dict(self.output_hashes)
+        for file_path in sorted(self.assets_dir.rglob("*")):
+            if file_path.is_file():
+                rel_path = file_path.relative_to(self.view_dir).as_posix()
+                with open(file_path, 'rb') as f:
+                    files[rel_path] = hashlib.sha256(f.read()).hexdigest()
+        return dict(sorted(files.items()))
+    
+    def _generate_service_worker(self):
+        """根据 sw_template.js 生成 sw.js
+        
+        sw.js 内嵌所有输出文件的哈希，内容变化时浏览器会安装新的 Service Worker，
+        并且只重新下载哈希变化的文件。
+        """
+        sw_path = "sw.js"
+        if not self.service_worker:
+            # 关闭时不能直接删除 sw.js：浏览器更新检查得到 404 时会继续使用旧的 Service Worker，
+            # 因此输出一个清空缓存并注销自身的 sw.js
+            with open(self.template_dir / 'sw_unregister.js', 'rb') as f:
+                self._write_output(sw_path, f.read())
+            return
+        
+        manifest = self._collect_output_hashes()
+        # 预缓存 assets 和首页（导航骨架），其他页面和图片在访问时缓存
+        precache_paths = [path for path in manifest if path.startswith("assets/")] + ["index.html"]
+        # 预缓存内容的版本：预缓存文件变化时新的 Service Worker 使用新的缓存，安装完成前不影响旧缓存
+        precache_version = hashlib.sha256(
+            json.dumps({path: manifest.get(path) for path in precache_paths}, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        
+        template = self.jinja_env.get_template('sw_template.js')
+        sw_output = template.render(
+            manifest=manifest,
+            precache_paths=precache_paths,
+            precache_version=precache_version,
+            max_pages=self.service_worker_config.get('max_pages', 200),
+            max_images=self.service_worker_config.get('max_images', 100)
+        )
+        self._write_output(sw_path, sw_output.encode('utf-8'))
+    
+    def _write_manifest(self):
+        """生成变更清单 manifest.json
+        
+        记录所有输出文件（包括 assets）的 sha256，并与上一次构建的清单比较，
+        列出新增、修改和删除的文件，部署时只需上传变化的文件并刷新对应的 CDN 路径。
+        """
+        manifest_path = "manifest.json"
+        
+        # 读取上一次构建的清单
+        previous_files = {}
+        previous_manifest = self.output.read(manifest_path)
+        if previous_manifest is not None:
+            try:
+                previous_files = json.loads(previous_manifest.decode('utf-8')).get('files', {})
+            except Exception as e:
+                print(f"警告: 读取旧清单失败: {e}，视为全量构建")
+        
+        files = self._collect_output_hashes()
+        
+        added = sorted(path for path in files if path not in previous_files)
+        changed = sorted(path for path in files if path in previous_files and previous_files[path] != files[path])
+        removed = sorted((set(previous_files) | self.removed_outputs) - set(files))
+        
+        manifest = {
+            'files': dict(sorted(files.items())),
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+        }
+        data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + '\n'
+        self.output.write(manifest_path, data.encode('utf-8'))
+        
+        print(f"变更清单: 新增 {len(added)} 个, 修改 {len(changed)} 个, 删除 {len(removed)} 个")
+    
     def _build_nav_tree(self) -> List[Dict]:
         """构建导航树结构"""
         nav_items = []
@@ -291,7 +495,7 @@ class DocSiteBuilder:
             # 只处理配置中允许的顶级目录下的文件
             allowed_prefixes = [str(self.docs_dir / top_dir) for top_dir in self.allowed_top_dirs]
         
-        for md_file in self.docs_dir.rglob("*.md"):
+        for md_file in sorted(self.docs_dir.rglob("*.md")):
             if md_file.name == 'template.html':
                 continue
             
@@ -380,14 +584,20 @@ class DocSiteBuilder:
     
     def _convert_markdown_file(self, md_path: Path, html_rel_path: str):
         """转换单个 Markdown 文件"""
+        # 存储 HTML 内容
+        self.html_contents[html_rel_path] = self.convert_markdown(md_path, html_rel_path)
+    
+    def convert_markdown(self, md_path: Path, html_rel_path: str) -> str:
+        """将 Markdown 文件转换为页面内容 HTML（已处理链接和图片路径）"""
         with open(md_path, 'r', encoding='utf-8') as f:
             md_content = f.read()
         
         # 规范化列表缩进（将 2 空格转换为 4 空格）
         md_content = self._normalize_list_indentation(md_content)
         
-        # 转换为 HTML
+        # 转换为 HTML（reset 会清空目录，需要先保存）
         html_content = self.md.convert(md_content)
+        self.page_toc[html_rel_path] = self.md.toc_tokens
         self.md.reset()
         
         # 处理链接
@@ -396,8 +606,7 @@ class DocSiteBuilder:
         # 处理图片路径
         html_content = self._process_images(html_content, html_rel_path, md_path)
         
-        # 存储 HTML 内容
-        self.html_contents[html_rel_path] = html_content
+        return html_content
     
     def _process_links(self, html_content: str, current_html_path: str) -> str:
         """处理 HTML 中的链接"""
@@ -543,6 +752,77 @@ class DocSiteBuilder:
         
         return str(soup)
     
+    def _update_search_index(self):
+        """增量更新全文搜索索引，只重新索引内容变化的页面"""
+        page_hashes = {
+            html_path: hashlib.sha256((self._get_page_title(html_path) + '\0' + content).encode('utf-8')).hexdigest()
+            for html_path, content in self.html_contents.items()
+        }
+        
+        def load_page(html_path: str) -> Tuple[str, List[str], str]:
+            headings = [heading['name'] for heading in self._get_page_headings(html_path)]
+            text = BeautifulSoup(self.html_contents[html_path], 'html.parser').get_text(' ')
+            return self._get_page_title(html_path), headings, re.sub(r'\s+', ' ', text).strip()
+        
+        index = SearchIndex(self.search_index_path)
+        try:
+            updated, removed = index.update(page_hashes, load_page)
+        finally:
+            index.close()
+        print(f"搜索索引: 更新 {updated} 个页面, 删除 {removed} 个页面")
+    
+    def _get_page_headings(self, html_path: str) -> List[Dict]:
+        """按文档顺序获取页面的所有标题 [{'level', 'id', 'name'}]，name 为纯文本"""
+        headings = []
+        
+        def collect_headings(tokens):
+            for token in tokens:
+                headings.append({'level': token['level'], 'id': token['id'], 'name': html.unescape(token['name'])})
+                collect_headings(token['children'])
+        
+        collect_headings(self.page_toc.get(html_path, []))
+        return headings
+    
+    def _write_anchor_index(self):
+        """生成锚点索引 anchors.json（页面路径 -> 标题列表），用于链接检查和深层链接解析"""
+        anchors = {
+            html_path: self._get_page_headings(html_path)
+            for html_path in sorted(self.html_contents)
+        }
+        data = json.dumps({'pages': anchors}, ensure_ascii=False, separators=(',', ':'))
+        self._write_output("anchors.json", data.encode('utf-8'))
+    
+    def _check_anchor_links(self):
+        """检查站内链接中的锚点是否对应目标页面的标题，找不到时输出警告"""
+        page_ids = {
+            html_path: {heading['id'] for heading in self._get_page_headings(html_path)}
+            for html_path in self.html_contents
+        }
+        
+        broken = 0
+        for html_path in sorted(self.html_contents):
+            for match in re.finditer(r'<a\b[^>]*?\bhref="([^"]*#[^"]*)"', self.html_contents[html_path]):
+                link_path, anchor = html.unescape(match.group(1)).split('#', 1)
+                if not anchor or re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', link_path):
+                    continue
+                
+                # 链接路径是相对当前页面的路径
+                if link_path:
+                    link_path = unquote(link_path)
+                    target = posixpath.normpath(posixpath.join(posixpath.dirname(html_path), link_path))
+                    # 指向目录的链接（normpath 会去掉末尾的 /，需要先判断）对应目录的 index.html
+                    if link_path.endswith('/') or posixpath.basename(link_path) in ('.', '..'):
+                        target = 'index.html' if target == '.' else posixpath.join(target, 'index.html')
+                else:
+                    target = html_path
+                
+                if target in page_ids and unquote(anchor) not in page_ids[target]:
+                    print(f"警告: {html_path} 中的链接 {match.group(1)} 指向不存在的标题")
+                    broken += 1
+        
+        if broken:
+            print(f"共有 {broken} 个链接指向不存在的标题")
+    
     def _copy_all_images(self):
         """复制所有图片文件和其他非 Markdown 文件到 html 目录"""
         image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.drawio.png'}
@@ -554,7 +834,7 @@ class DocSiteBuilder:
             # 只处理配置中允许的顶级目录下的文件
             allowed_prefixes = [str(self.docs_dir / top_dir) for top_dir in self.allowed_top_dirs]
         
-        for file_path in self.docs_dir.rglob("*"):
+        for file_path in sorted(self.docs_dir.rglob("*")):
             # 跳过目录
             if file_path.is_dir():
                 continue
@@ -572,52 +852,228 @@ class DocSiteBuilder:
             
             # 复制图片文件和其他文件
             rel_path = str(file_path.relative_to(self.docs_dir)).replace('\\', '/')
-            # 文件放到 html 目录下，保持相同的目录结构
-            view_file_path = self.html_dir / rel_path
-            
-            # 创建目标目录
-            view_file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # 复制文件
-            shutil.copy2(file_path, view_file_path)
+            # 文件放到 html 目录下，保持相同的目录结构（内容相同时不重写）
+            with open(file_path, 'rb') as f:
+                self._write_output(f"html/{rel_path}", f.read())
     
     def _generate_all_pages(self):
         """生成所有 HTML 页面"""
         template = self.jinja_env.get_template('template.html')
         
-        # 生成所有已转换的 Markdown 页面
-        for html_path, content in self.html_contents.items():
-            self._generate_page(template, html_path, content)
+        # 所有已转换的 Markdown 页面
+        pages = list(self.html_contents.items())
         
         # 为没有 README.md 的目录生成空白页面
-        self._generate_empty_directory_pages(template)
+        pages.extend(self._get_empty_directory_pages())
+        
+        # 模板片段按本次构建的模板和样式重新生成
+        self._page_segments = {}
+        
+        if not self.minify:
+            for html_path, content in pages:
+                # 写入文件（内容相同时不重写）
+                self._write_output(html_path, self._render_page_bytes(template, html_path, content))
+            return
+        
+        # 压缩时使用多进程并行处理
+        executor = ProcessPoolExecutor()
+        try:
+            for start in range(0, len(pages), PAGE_BATCH_SIZE):
+                batch = [
+                    (html_path, self.render_page(template, html_path, content))
+                    for html_path, content in pages[start:start + PAGE_BATCH_SIZE]
+                ]
+                self._write_pages(batch, executor)
+        finally:
+            executor.shutdown()
+        
+        self._prune_minify_cache()
     
-    def _generate_empty_directory_pages(self, template):
-        """为没有 README.md 的目录生成空白页面"""
+    def _get_empty_directory_pages(self) -> List[Tuple[str, str]]:
+        """获取没有 README.md 的目录对应的空白页面 (html路径, 页面内容)"""
+        pages = []
+        
         def process_nav_items(items):
             for item in items:
                 if item['type'] == 'directory' and not item['has_readme']:
-                    html_path = item['path']
                     # 生成空白页面
                     blank_content = f"<h1>{item['name']}</h1><p>此目录暂无内容。</p>"
-                    self._generate_page(template, html_path, blank_content)
+                    pages.append((item['path'], blank_content))
                 
                 # 递归处理子项
                 if 'children' in item and item['children']:
                     process_nav_items(item['children'])
         
         process_nav_items(self.nav_tree)
+        return pages
     
     def _generate_page(self, template, html_path: str, content: str):
         """生成单个 HTML 页面"""
-        # 确定文件路径
+        html_output = self.render_page(template, html_path, content)
+        self._write_pages([(html_path, html_output)])
+    
+    def _write_pages(self, pages: List[Tuple[str, str]], executor: Optional[ProcessPoolExecutor] = None):
+        """写入渲染后的页面（开启压缩时先压缩）"""
+        if self.minify:
+            pages = self._minify_pages(pages, executor)
+        
+        for html_path, html_output in pages:
+            # 写入文件（内容相同时不重写）
+            self._write_output(html_path, html_output.encode('utf-8'))
+    
+    def _minify_pages(self, pages: List[Tuple[str, str]], executor: Optional[ProcessPoolExecutor] = None) -> List[Tuple[str, str]]:
+        """压缩页面，结果按输入内容的哈希缓存，未命中的页面并行压缩"""
+        minify_cache_dir = self.cache_dir / "minify"
+        minify_cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        results = {}
+        missing = []
+        for html_path, html_output in pages:
+            key = hashlib.sha256((MINIFIER_VERSION + html_output).encode('utf-8')).hexdigest()
+            self.used_minify_keys.add(key)
+            cache_file = minify_cache_dir / f"{key}.html"
+            if cache_file.exists():
+                results[html_path] = cache_file.read_text(encoding='utf-8')
+            else:
+                missing.append((html_path, html_output, cache_file))
+        
+        if missing:
+            inputs = [html_output for _, html_output, _ in missing]
+            if executor is not None and len(missing) > 1:
+                outputs = executor.map(minify_html, inputs, chunksize=8)
+            else:
+                outputs = map(minify_html, inputs)
+            
+            for (html_path, _, cache_file), minified in zip(missing, outputs):
+                cache_file.write_text(minified, encoding='utf-8')
+                results[html_path] = minified
+        
+        return [(html_path, results[html_path]) for html_path, _ in pages]
+    
+    def _prune_minify_cache(self):
+        """删除本次构建未使用的压缩缓存"""
+        minify_cache_dir = self.cache_dir / "minify"
+        if not minify_cache_dir.exists():
+            return
+        for cache_file in minify_cache_dir.glob("*.html"):
+            if cache_file.stem not in self.used_minify_keys:
+                cache_file.unlink()
+    
+    def render_page(self, template, html_path: str, content: str) -> str:
+        """使用模板渲染单个 HTML 页面"""
+        return template.render(**self._get_page_context(html_path, content))
+    
+    def _render_page_bytes(self, template, html_path: str, content: str) -> bytearray:
+        """快速渲染单个 HTML 页面：拼接预编译的静态片段和页面的值
+        
+        页面外框只有标题、内容、导航树、页面目录和首图预加载地址随页面变化，base_path 只随深度变化，
+        因此每种深度只需用 Jinja 渲染一次。返回的缓冲区在下次调用时会被复用。
+        """
+        context = self._get_page_context(html_path, content)
+        key = (context['base_path'], tuple(preload['as'] for preload in context['preloads']), bool(context['toc']))
+        if key not in self._page_segments:
+            self._page_segments[key] = self._compile_page_segments(template, context)
+        
+        compiled = self._page_segments[key]
+        if compiled is None:
+            # 模板无法拆分（例如对页面值使用了过滤器），回退到 Jinja 渲染
+            return bytearray(template.render(**context).encode('utf-8'))
+        
+        return self._join_page_segments(compiled, self._get_slot_values(context))
+    
+    def _join_page_segments(self, compiled: Tuple[List[bytes], List[Tuple[str, bool]]], values: Dict[str, str]) -> bytearray:
+        """将静态片段和页面的值写入复用的缓冲区"""
+        segments, slots = compiled
+        buffer = self._page_buffer
+        buffer.clear()
+        buffer += segments[0]
+        for (name, needs_escape), segment in zip(slots, segments[1:]):
+            value = values[name]
+            buffer += (str(escape(value)) if needs_escape else value).encode('utf-8')
+            buffer += segment
+        return buffer
+    
+    def _compile_page_segments(self, template, context: Dict) -> Optional[Tuple[List[bytes], List[Tuple[str, bool]]]]:
+        """用探针值渲染一次模板，按探针位置拆分为静态片段
+        
+        探针包含 '<'，根据输出中是否被转义判断该位置是否需要转义。
+        拆分结果会与 Jinja 的渲染结果比较，不一致时返回 None。
+        """
+        probes = {name: f"\x00{name}<\x00" for name in PAGE_SLOTS}
+        probe_output = template.render(**self._with_slot_values(context, probes))
+        
+        # 找到所有探针出现的位置
+        positions = []
+        for name, probe in probes.items():
+            for form, needs_escape in ((probe, False), (str(escape(probe)), True)):
+                start = probe_output.find(form)
+                while start != -1:
+                    positions.append((start, len(form), name, needs_escape))
+                    start = probe_output.find(form, start + len(form))
+        positions.sort()
+        
+        segments = []
+        slots = []
+        last_end = 0
+        for start, length, name, needs_escape in positions:
+            segments.append(probe_output[last_end:start])
+            slots.append((name, needs_escape))
+            last_end = start + length
+        segments.append(probe_output[last_end:])
+        
+        # 探针被过滤器等修改过，无法拆分
+        if any('\x00' in segment for segment in segments):
+            return None
+        
+        compiled = ([segment.encode('utf-8') for segment in segments], slots)
+        expected = template.render(**context).encode('utf-8')
+        if bytes(self._join_page_segments(compiled, self._get_slot_values(context))) != expected:
+            return None
+        return compiled
+    
+    def _get_slot_values(self, context: Dict) -> Dict[str, str]:
+        """获取页面上下文中随页面变化的值"""
+        values = {name: context[name] for name in ('title', 'content', 'nav_tree', 'toc')}
+        for preload in context['preloads']:
+            if preload['as'] == 'image':
+                values['preload_image'] = preload['href']
+        return values
+    
+    def _with_slot_values(self, context: Dict, values: Dict[str, str]) -> Dict:
+        """用指定的值替换页面上下文中随页面变化的值"""
+        context = dict(context, title=values['title'], content=values['content'], nav_tree=values['nav_tree'])
+        # 没有页面目录的页面保持为空，模板中的目录侧栏不输出
+        if context['toc']:
+            context['toc'] = values['toc']
+        context['preloads'] = [
+            dict(preload, href=values['preload_image']) if preload['as'] == 'image' else preload
+            for preload in context['preloads']
+        ]
+        return context
+    
+    def _get_page_title(self, html_path: str) -> str:
+        """获取页面标题"""
+        title = Path(html_path).stem
+        if title == 'index':
+            # 尝试从父目录获取标题
+            parent_dir = Path(html_path).parent
+            if str(parent_dir) != '.':
+                title = parent_dir.name
+            else:
+                title = '首页'
+        else:
+            title = self._get_display_name(title)
+        return title
+    
+    def _get_page_context(self, html_path: str, content: str) -> Dict:
+        """获取渲染单个页面所需的模板变量"""
+        # 计算页面深度
         if html_path == "index.html":
             # index.html 在 docs 根目录
-            view_file_path = self.view_dir / html_path
             depth = 0
         else:
             # 其他页面在 docs/html 目录下
-            view_file_path = self.view_dir / html_path
             # 计算深度：html/spring/actuator.html -> depth = 2 (html + spring)
             if html_path.startswith("html/"):
                 # 移除 html/ 前缀来计算深度
@@ -635,40 +1091,110 @@ class DocSiteBuilder:
             else:
                 depth = 0
         
-        view_file_path.parent.mkdir(parents=True, exist_ok=True)
-        
         # 计算基础路径（用于引用 assets）
         base_path = "../" * depth if depth > 0 else "./"
         
         # 生成导航树 HTML
         nav_tree_html = self._render_nav_tree(self.nav_tree, html_path, base_path)
         
-        # 生成页面标题
-        title = Path(html_path).stem
-        if title == 'index':
-            # 尝试从父目录获取标题
-            parent_dir = Path(html_path).parent
-            if str(parent_dir) != '.':
-                title = parent_dir.name
-            else:
-                title = '首页'
-        else:
-            title = self._get_display_name(title)
+        return {
+            'title': self._get_page_title(html_path),
+            'content': content,
+            'nav_tree': nav_tree_html,
+            'toc': self._render_page_toc(html_path) if self.page_toc_enabled else '',
+            'base_path': base_path,
+            'critical_css': self._get_critical_css() if self.inline_critical_css else '',
+            'defer_scripts': self.defer_scripts,
+            'preloads': self._get_preloads(content, base_path) if self.preload else [],
+            'service_worker': self.service_worker,
+        }
+    
+    def _get_preloads(self, content: str, base_path: str) -> List[Dict]:
+        """获取页面需要预加载的资源：正文第一张图片和 assets 中的字体"""
+        preloads = []
         
-        # 渲染模板
-        html_output = template.render(
-            title=title,
-            content=content,
-            nav_tree=nav_tree_html,
-            base_path=base_path
-        )
+        # 正文第一张图片（路径已经是相对当前页面的路径）
+        # 正文已经过 BeautifulSoup 序列化，属性值中的 & 等需要还原，模板输出时会再转义
+        img_match = re.search(r'<img\b[^>]*?\bsrc="([^"]+)"', content)
+        if img_match:
+            preloads.append({'href': html.unescape(img_match.group(1)), 'as': 'image'})
+        
+        for font_path in sorted(self.assets_dir.glob('*.woff2')):
+            preloads.append({'href': f"{base_path}assets/{font_path.name}", 'as': 'font'})
         
-        # 写入文件
-        with open(view_file_path, 'w', encoding='utf-8') as f:
-            f.write(html_output)
+        return preloads
+    
+    def _get_critical_css(self) -> str:
+        """获取首屏关键样式（style.css 变化时重新提取）"""
+        style_path = self.assets_dir / "style.css"
+        if not style_path.exists():
+            return ''
+        
+        stat = style_path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._critical_css_cache is None or self._critical_css_cache[0] != key:
+            with open(style_path, 'r', encoding='utf-8') as f:
+                css = f.read()
+            self._critical_css_cache = (key, self._extract_critical_css(css))
+        
+        return self._critical_css_cache[1]
+    
+    def _extract_critical_css(self, css: str) -> str:
+        """从样式表中提取选择器匹配关键选择器前缀的规则（包括 @media 中的规则），并压缩空白"""
+        css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+        rules = []
+        pos = 0
+        
+        while True:
+            brace = css.find('{', pos)
+            if brace == -1:
+                break
+            selector = css[pos:brace].strip()
+            
+            # 找到与之匹配的右括号（@media 等规则中存在嵌套）
+            depth = 1
+            end = brace + 1
+            while end < len(css) and depth > 0:
+                if css[end] == '{':
+                    depth += 1
+                elif css[end] == '}':
+                    depth -= 1
+                end += 1
+            body = css[brace + 1:end - 1]
+            pos = end
+            
+            if selector.startswith('@'):
+                inner = self._extract_critical_css(body)
+                if inner:
+                    rules.append(f"{selector}{{{inner}}}")
+            elif any(self._is_critical_selector(part.strip()) for part in selector.split(',')):
+                declarations = ';'.join(
+                    re.sub(r'\s*:\s*', ':', decl.strip(), count=1)
+                    for decl in body.split(';') if decl.strip()
+                )
+                selector = re.sub(r'\s+', ' ', selector)
+                rules.append(f"{selector}{{{declarations}}}")
+        
+        return ''.join(rules)
+    
+    def _is_critical_selector(self, selector: str) -> bool:
+        """判断选择器是否属于首屏关键样式"""
+        if selector in self.critical_exact_selectors:
+            return True
+        for prefix in self.critical_selectors:
+            if selector.startswith(prefix):
+                # 前缀需要完整匹配一个名称（.nav- 这类以 - 结尾的前缀除外）
+                rest = selector[len(prefix):]
+                if prefix.endswith('-') or not rest or not (rest[0].isalnum() or rest[0] in '-_'):
+                    return True
+        return False
     
-    def _render_nav_tree(self, nav_items: List[Dict], current_path: str, base_path: str, level: int = 0) -> str:
-        """渲染导航树为 HTML"""
+    def _render_nav_tree(self, nav_items: List[Dict], current_path: str, base_path: str, level: int = 0, collapsed: bool = False) -> str:
+        """渲染导航树为 HTML
+        
+        collapsed 表示 nav_items 位于折叠的（不包含当前页面的）分支中，
+        延迟加载导航时这些目录的子项不输出，展开时再加载。
+        """
         html_parts = []
         
         for item in nav_items:
@@ -685,13 +1211,16 @@ class DocSiteBuilder:
                 if has_children:
                     html_parts.append(f'<span class="{icon_class}" data-toggle="collapse"></span>')
                 else:
-                    html_parts.append('<span class="nav-link-icon" style="width: 20px; margin-right: 4px;"></span>')
+                    html_parts.append('<span class="nav-link-icon"></span>')
                 html_parts.append(f'<a href="{base_path}{nav_path}" class="nav-link-text" data-path="{nav_path}">{item["name"]}</a>')
                 html_parts.append('</div>')
                 
-                if has_children:
+                if has_children and self.lazy_nav and collapsed:
+                    # 折叠分支第一层以下的子树不输出，展开时由 script.js 加载目录片段
+                    html_parts.append(f'<ul class="nav-children" data-nav-fragment="{base_path}{self._get_nav_fragment_path(nav_path)}"></ul>')
+                elif has_children:
                     html_parts.append(f'<ul class="nav-children{" expanded" if is_active else ""}">')
-                    html_parts.append(self._render_nav_tree(item['children'], current_path, base_path, level + 1))
+                    html_parts.append(self._render_nav_tree(item['children'], current_path, base_path, level + 1, collapsed or not is_active))
                     html_parts.append('</ul>')
                 
                 html_parts.append('</li>')
@@ -702,13 +1231,66 @@ class DocSiteBuilder:
                 
                 html_parts.append(f'<li class="nav-item">')
                 html_parts.append(f'<div class="{link_class}">')
-                html_parts.append('<span class="nav-link-icon" style="width: 20px; margin-right: 4px;"></span>')
+                html_parts.append('<span class="nav-link-icon"></span>')
                 html_parts.append(f'<a href="{base_path}{nav_path}" class="nav-link-text" data-path="{nav_path}">{item["name"]}</a>')
                 html_parts.append('</div>')
                 html_parts.append('</li>')
         
         return '\n'.join(html_parts)
     
+    def _render_page_toc(self, html_path: str) -> str:
+        """渲染页面目录（"本页内容"侧栏）为 HTML，标题太少时返回空字符串"""
+        headings = [
+            heading for heading in self._get_page_headings(html_path)
+            if 2 <= heading['level'] <= self.page_toc_max_level
+        ]
+        if len(headings) < self.page_toc_min_headings:
+            return ''
+        
+        html_parts = []
+        for heading in headings:
+            html_parts.append(f'<li class="page-toc-item page-toc-level-{heading["level"]}">')
+            html_parts.append(f'<a href="#{html.escape(heading["id"])}">{html.escape(heading["name"])}</a>')
+            html_parts.append('</li>')
+        
+        return '\n'.join(html_parts)
+    
+    def _get_nav_fragment_path(self, nav_path: str) -> str:
+        """获取目录导航片段的路径"""
+        return f"nav/{hashlib.sha256(nav_path.encode('utf-8')).hexdigest()[:16]}.json"
+    
+    def _generate_nav_fragments(self):
+        """为每个有子项的目录生成导航片段 JSON（延迟加载导航时使用）
+        
+        片段只包含目录的直接子项，子目录的子项同样延迟加载。
+        顶级目录的直接子项总是由服务端输出，不需要片段。
+        """
+        def process_nav_items(items, level=0):
+            for item in items:
+                if item['type'] != 'directory' or not item['children']:
+                    continue
+                if level == 0:
+                    process_nav_items(item['children'], level + 1)
+                    continue
+                
+                children = []
+                for child in item['children']:
+                    fragment = None
+                    if child['type'] == 'directory' and child['children']:
+                        fragment = self._get_nav_fragment_path(child['path'])
+                    children.append({
+                        'name': child['name'],
+                        'type': child['type'],
+                        'path': child['path'],
+                        'fragment': fragment,
+                    })
+                
+                data = json.dumps({'items': children}, ensure_ascii=False, separators=(',', ':'))
+                self._write_output(self._get_nav_fragment_path(item['path']), data.encode('utf-8'))
+                process_nav_items(item['children'], level + 1)
+        
+        process_nav_items(self.nav_tree)
+    
     def _generate_index(self):
         """生成首页"""
         readme_path = self.docs_dir / "README.md"
@@ -733,13 +1315,6 @@ class DocSiteBuilder:
         self._generate_page(template, "index.html", html_content)
 
 
-def get_project_root() -> Path:
-    """获取项目根目录（python 的父目录）"""
-    script_path = Path(__file__).resolve()
-    # 脚本在 python/build_site.py，项目根目录是 python 的父目录
-    return script_path.parent.parent
-
-
 def main():
     """主函数"""
     # 获取项目根目录
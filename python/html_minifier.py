@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTML 压缩
+折叠 <pre>/<code>/<script>/<style>/<textarea> 以外的空白，删除注释和冗余属性，
+并去掉代码块中 Pygments 生成的 <span> 标记（页面由 highlight.js 根据文本重新高亮）。
+"""
+
+import re
+
+# 压缩规则变化时修改版本号，使缓存失效
+MINIFIER_VERSION = "1"
+
+# 内容需要原样保留的标签
+PRESERVED_BLOCK_RE = re.compile(
+    r'(<(pre|code|script|style|textarea)\b[^>]*>.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# 保留内容的标签中属于块级元素的部分
+BLOCK_PRESERVED_TAGS = {'pre', 'script', 'style'}
+
+# 块级标签前后的空白不影响渲染，可以删除
+BLOCK_TAG_RE = re.compile(
+    r'\s*(</?(?:html|head|body|meta|link|title|script|style|div|ul|ol|li|p|br|hr|'
+    r'h[1-6]|table|thead|tbody|tr|th|td|blockquote|pre)\b[^>]*>)\s*',
+    re.IGNORECASE
+)
+
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+TAG_RE = re.compile(r'<[a-zA-Z][^>]*>')
+
+# 冗余属性：HTML5 默认值和空属性
+REDUNDANT_ATTR_RE = re.compile(
+    r'\s+(?:type="text/(?:javascript|css)"|class=""|style="")',
+    re.IGNORECASE
+)
+
+PYGMENTS_SPAN_RE = re.compile(r'</?span\b[^>]*>', re.IGNORECASE)
+
+
+def _strip_redundant_attrs(tag: str) -> str:
+    """删除标签中的冗余属性"""
+    return REDUNDANT_ATTR_RE.sub('', tag)
+
+
+def _minify_text(html: str) -> str:
+    """压缩不需要保留空白的 HTML 片段"""
+    html = COMMENT_RE.sub('', html)
+    html = WHITESPACE_RE.sub(' ', html)
+    html = BLOCK_TAG_RE.sub(r'\1', html)
+    return TAG_RE.sub(lambda m: _strip_redundant_attrs(m.group(0)), html)
+
+
+def _minify_preserved(block: str, tag_name: str) -> str:
+    """处理需要保留内容的标签：只清理开始标签的属性，代码块去掉 Pygments 标记"""
+    start_tag_end = block.index('>') + 1
+    start_tag = _strip_redundant_attrs(block[:start_tag_end])
+    body = block[start_tag_end:]
+
+    # codehilite 生成的代码块：<pre><span></span><code><span class="k">...</span>...</code></pre>
+    if tag_name.lower() == 'pre' and '<code' in body:
+        body = PYGMENTS_SPAN_RE.sub('', body)
+
+    return start_tag + body
+
+
+def minify_html(html: str) -> str:
+    """压缩 HTML 页面
+
+    Args:
+        html: 完整的 HTML 页面
+
+    Returns:
+        str: 压缩后的 HTML
+    """
+    parts = []
+    last_end = 0
+    after_block = False
+    for match in PRESERVED_BLOCK_RE.finditer(html):
+        text = _minify_text(html[last_end:match.start()])
+        is_block = match.group(2).lower() in BLOCK_PRESERVED_TAGS
+        # 块级标签前后的空白可以删除
+        if after_block:
+            text = text.lstrip()
+        if is_block:
+            text = text.rstrip()
+        parts.append(text)
+        parts.append(_minify_preserved(match.group(1), match.group(2)))
+        last_end = match.end()
+        after_block = is_block
+
+    text = _minify_text(html[last_end:])
+    parts.append(text.lstrip() if after_block else text)
+
+    return ''.join(parts).strip()
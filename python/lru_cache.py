@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按字节数限制大小的 LRU 缓存
+按需渲染服务（页面）和搜索服务（查询结果）共用，缓存项带版本，版本不一致时视为未命中。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class ByteLRUCache:
+    """按字节数限制大小的 LRU 缓存"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # 键 -> (版本, 值, 字节数)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        """获取缓存的值，不存在或版本不一致时返回 None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                # 数据已变化，丢弃旧值
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, version: Hashable, value: Any, size: int):
+        """缓存值（size 为其占用的字节数），超出大小限制时淘汰最久未使用的项"""
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (version, value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+
+    def _remove(self, key: Hashable):
+        """删除缓存项（调用方持有锁）"""
+        _, _, size = self.entries.pop(key)
+        self.current_bytes -= size
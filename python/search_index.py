@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+全文搜索索引
+基于 SQLite FTS5 的持久化索引，中日韩文字按二元组分词，
+使用 BM25 排序（标题和目录标题加权），构建时只更新内容变化的页面。
+"""
+
+import html
+import re
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from site_config import CACHE_DIR
+
+# 中日韩文字（假名、汉字、谚文）
+CJK_CHARS = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+
+# 单词字符（不包括中日韩文字和下划线）
+WORD_CHAR = rf'[^\W_{CJK_CHARS}]'
+
+# 中日韩文字连续片段 / 其他单词
+TOKEN_RE = re.compile(rf'([{CJK_CHARS}]+)|({WORD_CHAR}+)')
+
+# BM25 列权重：标题、目录标题、正文
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+# 摘要长度（字符）
+SNIPPET_RADIUS = 60
+
+# 分词方式的版本，分词变化时需要重新建立索引
+TOKENIZER_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    hash TEXT NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(title, headings, body, tokenize='unicode61');
+"""
+
+
+def resolve_index_path(config: Dict, project_root: Path) -> Path:
+    """根据配置中的 search.index_path（相对项目根目录）获取索引路径，未配置时使用构建缓存目录"""
+    index_path = config.get('search', {}).get('index_path')
+    if index_path:
+        return project_root / index_path
+    return CACHE_DIR / "search.db"
+
+
+def tokenize(text: str) -> List[str]:
+    """分词：中日韩文字切分为相邻二元组，再加上每个单字，其他单词转为小写
+
+    单字放在该片段的所有二元组之后，二元组保持相邻，多字查询按二元组短语匹配，
+    单字查询匹配单字（片段末尾的字不是任何二元组的第一个字）。
+    """
+    tokens = []
+    for cjk, word in TOKEN_RE.findall(text):
+        if cjk:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            tokens.extend(cjk)
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def is_prefix_word(query: str, match: re.Match) -> bool:
+    """单词是否位于输入末尾（仍在输入中），这样的单词按前缀匹配"""
+    return match.group(2) is not None and match.end() == len(query.rstrip())
+
+
+def build_match_query(query: str) -> str:
+    """将用户输入转换为 FTS5 查询表达式，所有词都需要匹配
+
+    中日韩片段转换为二元组短语（相当于子串匹配），单个汉字匹配索引中的单字，位于输入末尾的单词按前缀匹配。
+    """
+    terms = []
+    for match in TOKEN_RE.finditer(query):
+        cjk, word = match.groups()
+        if cjk and len(cjk) == 1:
+            terms.append(f'"{cjk}"')
+        elif cjk:
+            terms.append('"' + ' '.join(cjk[i:i + 2] for i in range(len(cjk) - 1)) + '"')
+        elif is_prefix_word(query, match):
+            terms.append(f'"{word.lower()}"*')
+        else:
+            terms.append(f'"{word.lower()}"')
+    return ' '.join(terms)
+
+
+def make_snippet(body: str, query: str) -> str:
+    """截取正文中第一个匹配位置附近的文字，匹配部分用 <mark> 标记"""
+    matches = list(TOKEN_RE.finditer(query))
+    if not matches:
+        return html.escape(body[:SNIPPET_RADIUS * 2])
+
+    # 单词按分词边界匹配（与 FTS 查询一致，输入末尾的单词按前缀匹配），避免标记其他单词中间的字母
+    patterns = set()
+    for match in matches:
+        cjk, word = match.groups()
+        if cjk:
+            patterns.add((len(cjk), re.escape(cjk)))
+        else:
+            suffix = '' if is_prefix_word(query, match) else f'(?!{WORD_CHAR})'
+            patterns.add((len(word), f'(?<!{WORD_CHAR}){re.escape(word)}{suffix}'))
+    pattern = re.compile('|'.join(term for _, term in sorted(patterns, reverse=True)), re.IGNORECASE)
+    match = pattern.search(body)
+    center = match.start() if match else 0
+    start = max(0, center - SNIPPET_RADIUS)
+    end = min(len(body), center + SNIPPET_RADIUS)
+    fragment = body[start:end]
+
+    parts = []
+    last_end = 0
+    for term_match in pattern.finditer(fragment):
+        parts.append(html.escape(fragment[last_end:term_match.start()]))
+        parts.append(f"<mark>{html.escape(term_match.group(0))}</mark>")
+        last_end = term_match.end()
+    parts.append(html.escape(fragment[last_end:]))
+
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(body) else '')
+
+
+class SearchIndex:
+    """全文搜索索引"""
+
+    def __init__(self, index_path: Path):
+        self.index_path = index_path
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(index_path), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != TOKENIZER_VERSION:
+            # 旧索引的分词方式不同，清空后由 update 重新索引所有页面
+            with self.conn:
+                self.conn.execute("DELETE FROM pages_fts")
+                self.conn.execute("DELETE FROM pages")
+                self.conn.execute(f"PRAGMA user_version = {TOKENIZER_VERSION}")
+
+    def close(self):
+        """关闭索引"""
+        self.conn.close()
+
+    def data_version(self) -> int:
+        """索引版本，其他连接（例如构建过程）修改索引后会变化"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def update(self, page_hashes: Dict[str, str], load_page: Callable[[str], Tuple[str, List[str], str]]) -> Tuple[int, int]:
+        """增量更新索引，只重新索引内容哈希变化的页面
+
+        Args:
+            page_hashes: 所有页面的 页面路径 -> 内容哈希，不在其中的页面会从索引中删除
+            load_page: 根据页面路径获取 (标题, 目录标题列表, 正文纯文本)，只对需要更新的页面调用
+
+        Returns:
+            (更新的页面数, 删除的页面数)
+        """
+        existing: Dict[str, Tuple[int, str]] = {
+            path: (page_id, page_hash)
+            for page_id, path, page_hash in self.conn.execute("SELECT id, path, hash FROM pages")
+        }
+        updated = 0
+
+        with self.conn:
+            for path, page_hash in page_hashes.items():
+                if path in existing and existing[path][1] == page_hash:
+                    continue
+
+                title, headings, body = load_page(path)
+                if path in existing:
+                    page_id = existing[path][0]
+                    self.conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (page_id,))
+                    self.conn.execute(
+                        "UPDATE pages SET hash = ?, title = ?, body = ? WHERE id = ?",
+                        (page_hash, title, body, page_id)
+                    )
+                else:
+                    page_id = self.conn.execute(
+                        "INSERT INTO pages (path, hash, title, body) VALUES (?, ?, ?, ?)",
+                        (path, page_hash, title, body)
+                    ).lastrowid
+
+                self.conn.execute(
+                    "INSERT INTO pages_fts (rowid, title, headings, body) VALUES (?, ?, ?, ?)",
+                    (page_id, ' '.join(tokenize(title)), ' '.join(tokenize(' '.join(headings))), ' '.join(tokenize(body)))
+                )
+                updated += 1
+
+            removed = [page_id for path, (page_id, _) in existing.items() if path not in page_hashes]
+            for page_id in removed:
+                self.conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (page_id,))
+                self.conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+
+        return updated, len(removed)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """搜索页面，按 BM25 得分排序
+
+        Returns:
+            [{'path', 'title', 'snippet', 'score'}]，score 越小越相关
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+
+        rows = self.conn.execute(
+            "SELECT pages.path, pages.title, pages.body, bm25(pages_fts, ?, ?, ?) AS score "
+            "FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ? ORDER BY score LIMIT ?",
+            (*COLUMN_WEIGHTS, match_query, limit)
+        ).fetchall()
+
+        return [
+            {'path': path, 'title': title, 'snippet': make_snippet(body, query), 'score': score}
+            for path, title, body, score in rows
+        ]
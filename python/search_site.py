@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文档站点本地搜索服务
+查询 build_site.py 构建时生成的全文搜索索引，GET /search?q=关键词&limit=10 返回 JSON 结果，
+热门查询的结果保存在 LRU 缓存中，索引被重新构建后缓存自动失效。
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from lru_cache import ByteLRUCache
+from search_index import SearchIndex, resolve_index_path
+from site_config import get_project_root, load_config
+
+# 单次查询最多返回的结果数
+MAX_LIMIT = 50
+
+
+class SearchService:
+    """带查询缓存的搜索服务"""
+
+    def __init__(self, index: SearchIndex, cache_bytes: int = 16 * 1024 * 1024):
+        self.index = index
+        self.cache = ByteLRUCache(cache_bytes)
+        # SQLite 连接在线程间共享，查询时加锁
+        self.lock = threading.Lock()
+
+    def search(self, query: str, limit: int) -> bytes:
+        """搜索并返回 JSON 响应内容"""
+        with self.lock:
+            version = (self.index.data_version(),)
+            cache_key = f"{limit}:{query}"
+            cached = self.cache.get(cache_key, version)
+            if cached is not None:
+                return cached
+
+            results = self.index.search(query, limit)
+
+        body = json.dumps({'query': query, 'results': results}, ensure_ascii=False).encode('utf-8')
+        self.cache.put(cache_key, version, body, len(body))
+        return body
+
+
+def make_handler(service: SearchService):
+    """创建绑定到指定 SearchService 的请求处理类"""
+
+    class SearchRequestHandler(BaseHTTPRequestHandler):
+        """处理搜索请求"""
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path != '/search':
+                self.send_error(404)
+                return
+
+            query, limit = self._parse_query(url.query)
+            body = service.search(query, limit)
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            # 静态站点和搜索服务可能不在同一个域名下
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _parse_query(self, query_string: str) -> Tuple[str, int]:
+            """解析查询参数 q 和 limit"""
+            params = parse_qs(query_string)
+            query = params.get('q', [''])[0].strip()
+            try:
+                limit = int(params.get('limit', ['10'])[0])
+            except ValueError:
+                limit = 10
+            return query, max(1, min(limit, MAX_LIMIT))
+
+    return SearchRequestHandler
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="文档站点本地搜索服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8001, help="监听端口")
+    parser.add_argument('--cache-mb', type=int, default=16, help="查询缓存大小（MB）")
+    parser.add_argument('--index', help="索引文件路径（默认读取配置文件）")
+    args = parser.parse_args()
+
+    # 索引路径与构建时一致（来自配置文件），不需要 src 目录
+    index_path = Path(args.index).resolve() if args.index else resolve_index_path(load_config(), get_project_root())
+    if not index_path.exists():
+        print(f"搜索索引不存在: {index_path}，请先运行 build_site.py")
+        return 1
+
+    service = SearchService(SearchIndex(index_path), cache_bytes=args.cache_mb * 1024 * 1024)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"搜索服务已启动: http://{args.host}:{args.port}/search?q=")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务已停止")
+    finally:
+        httpd.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文档站点按需渲染服务
+启动时只扫描一次导航树和路径映射，页面在首次请求时才转换和渲染，
+渲染结果保存在按内存大小限制的 LRU 缓存中，图片和 assets 直接从 src 和 docs/assets 读取。
+"""
+
+import argparse
+import hashlib
+import mimetypes
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from build_site import DocSiteBuilder
+from html_minifier import minify_html
+from lru_cache import ByteLRUCache
+from site_config import get_project_root
+
+
+class DocSiteServer:
+    """基于 DocSiteBuilder 的按需渲染服务"""
+
+    def __init__(self, builder: DocSiteBuilder, cache_bytes: int = 64 * 1024 * 1024):
+        self.builder = builder
+        # html_path -> (页面内容, ETag)
+        self.cache = ByteLRUCache(cache_bytes)
+        # Markdown 转换器不是线程安全的，渲染时加锁
+        self.render_lock = threading.Lock()
+        # 按需渲染时不生成 sw.js 和导航片段，页面不注册 Service Worker，导航完整输出
+        self.builder.service_worker = False
+        self.builder.lazy_nav = False
+
+        # 扫描文档目录（只执行一次）
+        print("扫描文档目录...")
+        self.builder.scan()
+
+        # 页面路径 -> Markdown 源文件
+        self.page_sources: Dict[str, Path] = {
+            html_path: self.builder.docs_dir / docs_rel
+            for docs_rel, html_path in self.builder.path_mapping.items()
+        }
+        # 没有 README.md 的目录页面 -> 目录名称
+        self.empty_directory_pages: Dict[str, str] = {}
+        self._collect_empty_directory_pages(self.builder.nav_tree)
+
+    def _collect_empty_directory_pages(self, nav_items):
+        """收集没有 README.md 的目录对应的页面"""
+        for item in nav_items:
+            if item['type'] == 'directory':
+                if not item['has_readme']:
+                    self.empty_directory_pages[item['path']] = item['name']
+                self._collect_empty_directory_pages(item['children'])
+
+    def get_page(self, html_path: str) -> Optional[Tuple[bytes, str]]:
+        """获取渲染后的页面和 ETag，页面不存在时返回 None"""
+        md_path = self.page_sources.get(html_path)
+        if md_path is None and html_path not in self.empty_directory_pages and html_path != "index.html":
+            return None
+
+        # 源文件、模板和样式表（内联关键样式）的修改时间、大小作为缓存版本
+        version = ()
+        for dependency in (self.builder.template_dir / 'template.html', self.builder.assets_dir / 'style.css'):
+            if dependency.exists():
+                dependency_stat = dependency.stat()
+                version += (dependency_stat.st_mtime_ns, dependency_stat.st_size)
+        if md_path is not None:
+            try:
+                md_stat = md_path.stat()
+            except FileNotFoundError:
+                return None
+            version += (md_stat.st_mtime_ns, md_stat.st_size)
+
+        cached = self.cache.get(html_path, version)
+        if cached is not None:
+            return cached
+
+        with self.render_lock:
+            if md_path is not None:
+                content = self.builder.convert_markdown(md_path, html_path)
+            elif html_path in self.empty_directory_pages:
+                content = f"<h1>{self.empty_directory_pages[html_path]}</h1><p>此目录暂无内容。</p>"
+            else:
+                content = "<h1>欢迎</h1><p>这是文档站点的首页。</p>"
+
+            template = self.builder.jinja_env.get_template('template.html')
+            html_output = self.builder.render_page(template, html_path, content)
+            if self.builder.minify:
+                html_output = minify_html(html_output)
+            body = html_output.encode('utf-8')
+
+        etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+        self.cache.put(html_path, version, (body, etag), len(body))
+        return body, etag
+
+    def get_static_file(self, rel_path: str) -> Optional[Path]:
+        """获取 assets 或 src 中的静态文件路径，不存在或不允许访问时返回 None"""
+        if rel_path.startswith("assets/"):
+            base_dir = self.builder.assets_dir
+            file_path = (base_dir / rel_path[len("assets/"):]).resolve()
+        elif rel_path.startswith("html/"):
+            base_dir = self.builder.docs_dir
+            file_path = (base_dir / rel_path[len("html/"):]).resolve()
+        else:
+            return None
+
+        # 防止路径穿越
+        try:
+            docs_rel = file_path.relative_to(base_dir)
+        except ValueError:
+            return None
+
+        if not file_path.is_file():
+            return None
+
+        # src 中只提供非 Markdown 文件，且遵循配置中的顶级目录限制
+        if base_dir == self.builder.docs_dir:
+            if file_path.suffix.lower() == '.md':
+                return None
+            allowed_top_dirs = self.builder.allowed_top_dirs
+            if allowed_top_dirs and docs_rel.parts[0] not in allowed_top_dirs:
+                return None
+
+        return file_path
+
+
+def make_handler(server: DocSiteServer):
+    """创建绑定到指定 DocSiteServer 的请求处理类"""
+
+    class DocSiteRequestHandler(BaseHTTPRequestHandler):
+        """处理页面和静态文件请求"""
+
+        def do_GET(self):
+            self._handle(send_body=True)
+
+        def do_HEAD(self):
+            self._handle(send_body=False)
+
+        def _handle(self, send_body: bool):
+            rel_path = unquote(urlsplit(self.path).path).lstrip('/')
+            if rel_path == '' or rel_path.endswith('/'):
+                rel_path += 'index.html'
+
+            page = server.get_page(rel_path)
+            if page is not None:
+                body, etag = page
+                self._send(body, etag, 'text/html; charset=utf-8', send_body)
+                return
+
+            file_path = server.get_static_file(rel_path)
+            if file_path is not None:
+                with open(file_path, 'rb') as f:
+                    body = f.read()
+                etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+                content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+                self._send(body, etag, content_type, send_body)
+                return
+
+            self.send_error(404)
+
+        def _send(self, body: bytes, etag: str, content_type: str, send_body: bool):
+            """发送响应，If-None-Match 匹配时返回 304"""
+            if_none_match = self.headers.get('If-None-Match')
+            if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+    return DocSiteRequestHandler
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="文档站点按需渲染服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口")
+    parser.add_argument('--cache-mb', type=int, default=64, help="页面缓存大小（MB）")
+    args = parser.parse_args()
+
+    # 获取项目根目录
+    project_root = get_project_root()
+
+    # 切换到项目根目录
+    os.chdir(project_root)
+
+    builder = DocSiteBuilder(str(project_root / "src"), str(project_root / "docs"))
+    server = DocSiteServer(builder, cache_bytes=args.cache_mb * 1024 * 1024)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(server))
+    print(f"服务已启动: http://{args.host}:{args.port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务已停止")
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
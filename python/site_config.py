@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+站点配置
+构建脚本和各服务共用的配置文件读取、项目根目录和构建缓存目录。
+"""
+
+import json
+from pathlib import Path
+from typing import Dict
+
+# 构建缓存目录（不随站点发布）
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+
+def get_project_root() -> Path:
+    """获取项目根目录（python 的父目录）"""
+    script_path = Path(__file__).resolve()
+    # 脚本在 python/ 目录下，项目根目录是 python 的父目录
+    return script_path.parent.parent
+
+
+def load_config(config_path: str = "config.json") -> Dict:
+    """加载配置文件"""
+    config_file = Path(config_path)
+    if not config_file.is_absolute():
+        # 如果是相对路径，相对于脚本所在目录
+        script_dir = Path(__file__).parent
+        config_file = script_dir / config_path
+
+    if config_file.exists():
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                print(f"已加载配置文件: {config_file}")
+                return config
+        except Exception as e:
+            print(f"警告: 加载配置文件失败: {e}，使用默认配置")
+            return {}
+    else:
+        print(f"警告: 配置文件不存在: {config_file}，使用默认配置")
+        return {}
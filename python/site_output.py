@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+站点输出后端
+DirectoryOutput 将文件写入 docs 目录（默认），ArchiveOutput 将文件直接写入 .zip/.tar/.tar.gz/.tar.zst 归档，
+不在文件系统中生成目录树。
+"""
+
+import gzip
+import io
+import os
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+from typing import List, Optional, Set
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class DirectoryOutput:
+    """写入目录的输出后端（内容相同时跳过写入）"""
+
+    def __init__(self, view_dir: Path, source_date_epoch: Optional[int] = None):
+        self.view_dir = view_dir
+        self.source_date_epoch = source_date_epoch
+
+    def read(self, rel_path: str) -> Optional[bytes]:
+        """读取上一次构建输出的文件，不存在时返回 None"""
+        file_path = self.view_dir / rel_path
+        if not file_path.is_file():
+            return None
+        with open(file_path, 'rb') as f:
+            return f.read()
+
+    def write(self, rel_path: str, data: bytes):
+        """写入文件
+
+        内容未变化的文件不会被重写，修改时间保持不变，
+        rsync 或对象存储上传时只会传输真正变化的文件。
+        """
+        file_path = self.view_dir / rel_path
+
+        # 内容相同则跳过
+        if file_path.is_file() and file_path.stat().st_size == len(data):
+            with open(file_path, 'rb') as f:
+                if f.read() == data:
+                    return
+
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+        # 统一修改时间，保证输出可复现
+        if self.source_date_epoch is not None:
+            os.utime(file_path, (self.source_date_epoch, self.source_date_epoch))
+
+    def remove(self, rel_path: str) -> bool:
+        """删除文件，返回文件是否存在"""
+        file_path = self.view_dir / rel_path
+        if not file_path.exists():
+            return False
+        file_path.unlink()
+        return True
+
+    def remove_stale(self, sub_dir: str, written: Set[str]) -> List[str]:
+        """删除子目录中本次构建未写入的文件和空目录，返回删除的文件"""
+        removed = []
+        for file_path in sorted((self.view_dir / sub_dir).rglob("*"), reverse=True):
+            if file_path.is_dir():
+                # 子项已先于目录处理，此时为空则删除
+                if not any(file_path.iterdir()):
+                    file_path.rmdir()
+                continue
+
+            rel_path = file_path.relative_to(self.view_dir).as_posix()
+            if rel_path not in written:
+                file_path.unlink()
+                removed.append(rel_path)
+        return removed
+
+    def close(self):
+        """完成输出"""
+
+    def abort(self):
+        """构建失败时放弃输出"""
+
+
+class ArchiveOutput:
+    """直接写入归档文件的输出后端
+
+    文件按写入顺序（构建顺序固定）流式写入临时文件，成员的修改时间、属主和权限统一，
+    相同输入得到字节相同的归档。构建成功后替换原归档。
+    """
+
+    def __init__(self, archive_path: Path, source_date_epoch: Optional[int] = None):
+        self.archive_path = archive_path
+        # zip 格式不支持 1980 年之前的时间
+        self.mtime = source_date_epoch if source_date_epoch is not None else 315532800
+        self.name = archive_path.name.lower()
+        self.tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._file = open(self.tmp_path, 'wb')
+        self._compressor = None
+        self._zip = None
+        self._tar = None
+
+        if self.name.endswith('.zip'):
+            self._zip = zipfile.ZipFile(self._file, 'w', compression=zipfile.ZIP_DEFLATED)
+        elif self.name.endswith('.tar.zst'):
+            if zstandard is None:
+                self._file.close()
+                self.tmp_path.unlink()
+                raise RuntimeError("输出 .tar.zst 需要安装 zstandard: pip install zstandard")
+            self._compressor = zstandard.ZstdCompressor().stream_writer(self._file, closefd=False)
+            self._tar = tarfile.open(fileobj=self._compressor, mode='w|', format=tarfile.PAX_FORMAT)
+        elif self.name.endswith('.tar.gz') or self.name.endswith('.tgz'):
+            # gzip 头中的时间同样固定
+            self._compressor = gzip.GzipFile(filename='', fileobj=self._file, mode='wb', mtime=self.mtime)
+            self._tar = tarfile.open(fileobj=self._compressor, mode='w|', format=tarfile.PAX_FORMAT)
+        elif self.name.endswith('.tar'):
+            self._tar = tarfile.open(fileobj=self._file, mode='w|', format=tarfile.PAX_FORMAT)
+        else:
+            self._file.close()
+            self.tmp_path.unlink()
+            raise ValueError(f"不支持的归档格式: {archive_path}（支持 .zip/.tar/.tar.gz/.tar.zst）")
+
+    def read(self, rel_path: str) -> Optional[bytes]:
+        """从上一次构建的归档中读取文件，不存在时返回 None"""
+        if not self.archive_path.exists():
+            return None
+        try:
+            if self._zip is not None:
+                with zipfile.ZipFile(self.archive_path) as archive:
+                    return archive.read(rel_path)
+
+            with open(self.archive_path, 'rb') as f:
+                if self.name.endswith('.tar.zst'):
+                    stream = zstandard.ZstdDecompressor().stream_reader(f)
+                elif self.name.endswith('.tar'):
+                    stream = f
+                else:
+                    stream = gzip.GzipFile(fileobj=f, mode='rb')
+                with tarfile.open(fileobj=stream, mode='r|') as archive:
+                    for member in archive:
+                        if member.name == rel_path:
+                            return archive.extractfile(member).read()
+        except (KeyError, OSError, tarfile.TarError, zipfile.BadZipFile):
+            return None
+        return None
+
+    def write(self, rel_path: str, data: bytes):
+        """写入归档成员"""
+        if self._zip is not None:
+            info = zipfile.ZipInfo(rel_path, date_time=self._zip_date_time())
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, bytes(data))
+            return
+
+        info = tarfile.TarInfo(rel_path)
+        info.size = len(data)
+        info.mtime = self.mtime
+        info.mode = 0o644
+        info.uid = info.gid = 0
+        info.uname = info.gname = ''
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def remove(self, rel_path: str) -> bool:
+        """归档每次重新生成，没有需要删除的文件"""
+        return False
+
+    def remove_stale(self, sub_dir: str, written: Set[str]) -> List[str]:
+        """归档每次重新生成，没有需要删除的文件"""
+        return []
+
+    def close(self):
+        """完成归档并替换原文件"""
+        self._finish()
+        os.replace(self.tmp_path, self.archive_path)
+
+    def abort(self):
+        """构建失败时删除临时文件，保留原归档"""
+        try:
+            self._finish()
+        finally:
+            if self.tmp_path.exists():
+                self.tmp_path.unlink()
+
+    def _finish(self):
+        """关闭归档和压缩流"""
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+        if self._compressor is not None:
+            self._compressor.close()
+        self._file.close()
+
+    def _zip_date_time(self):
+        """zip 成员的时间（UTC）"""
+        return time.gmtime(self.mtime)[:6]